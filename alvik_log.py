@@ -0,0 +1,132 @@
+import json
+
+try:
+    from time import ticks_ms, ticks_diff  # MicroPython
+except ImportError:
+    from time import monotonic
+
+    def ticks_ms():
+        return int(monotonic() * 1000)
+
+    def ticks_diff(a, b):
+        return a - b
+
+# ------------------- LOGGING -------------------
+# Leveled logging for the robot scripts that keeps the control loop fast:
+#  - entries go into a fixed-size ring in RAM, stored unformatted
+#  - only entries at or above print_level are written to the serial console
+#  - messages can be rate limited per key with every_ms
+#  - the ring is formatted only when dumped or shipped over MQTT, in batches
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+
+class Logger:
+    """ Leveled, rate-limited logger with an in-RAM ring of recent entries. """
+
+    def __init__(self, name, level=INFO, print_level=WARNING, ring_size=64):
+        self.name = name
+        self.level = level
+        self.print_level = print_level
+        self._ring = [None] * ring_size
+        self._next = 0  # Total entries ever recorded
+        self._shipped = 0  # Entries already sent by ship()
+        self._shipped_at = ticks_ms()
+        self._last = {}  # Rate limit key -> ticks of last accepted entry
+        self._suppressed = {}  # Rate limit key -> entries dropped since
+
+    def log(self, level, msg, *args, every_ms=0, key=None):
+        """ Records msg % args; returns False if filtered or rate limited.
+
+        Formatting is deferred, so pass values as args rather than building
+        the string at the call site.
+        """
+        if level < self.level:
+            return False
+
+        now = ticks_ms()
+        suppressed = 0
+        if every_ms:
+            key = key or msg
+            last = self._last.get(key)
+            if last is not None and ticks_diff(now, last) < every_ms:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            self._last[key] = now
+            suppressed = self._suppressed.pop(key, 0)
+
+        entry = (now, level, msg, args, suppressed)
+        self._ring[self._next % len(self._ring)] = entry
+        self._next += 1
+
+        if level >= self.print_level:
+            print(self.format(entry))
+        return True
+
+    def debug(self, msg, *args, **kwargs):
+        return self.log(DEBUG, msg, *args, **kwargs)
+
+    def info(self, msg, *args, **kwargs):
+        return self.log(INFO, msg, *args, **kwargs)
+
+    def warning(self, msg, *args, **kwargs):
+        return self.log(WARNING, msg, *args, **kwargs)
+
+    def error(self, msg, *args, **kwargs):
+        return self.log(ERROR, msg, *args, **kwargs)
+
+    def format(self, entry):
+        ticks, level, msg, args, suppressed = entry
+        text = msg % args if args else msg
+        if suppressed:
+            text += " (+%d suppressed)" % suppressed
+        return "%d %s %s: %s" % (ticks, LEVEL_NAMES.get(level, level), self.name, text)
+
+    def entries(self, since=0):
+        """ Returns the retained entries recorded after the first since, oldest first. """
+        size = len(self._ring)
+        start = max(since, self._next - size)
+        return [self._ring[i % size] for i in range(start, self._next)]
+
+    def dump(self):
+        """ Prints every retained entry, e.g. from the REPL after a run. """
+        for entry in self.entries():
+            print(self.format(entry))
+
+    @property
+    def pending(self):
+        """ Number of entries recorded since the last ship(). """
+        return self._next - self._shipped
+
+    def ship(self, client, topic, batch=16, level=DEBUG):
+        """ Publishes entries not yet shipped as JSON lists of at most batch lines.
+
+        Only entries at or above level are sent. Returns the number of entries
+        sent; entries overwritten in the ring before they could be shipped are
+        skipped.
+        """
+        pending = [entry for entry in self.entries(self._shipped) if entry[1] >= level]
+        for i in range(0, len(pending), batch):
+            lines = [self.format(entry) for entry in pending[i:i + batch]]
+            client.publish(topic, json.dumps({"logger": self.name, "lines": lines}))
+        self._shipped = self._next
+        self._shipped_at = ticks_ms()
+        return len(pending)
+
+    def maybe_ship(self, client, topic, every_ms=5000, batch=16, level=DEBUG):
+        """ Calls ship() once batch entries are pending or every_ms has passed.
+
+        Cheap enough to call on every loop iteration; returns the number of
+        entries sent.
+        """
+        pending = self.pending
+        if not pending:
+            return 0
+        if pending < batch and ticks_diff(ticks_ms(), self._shipped_at) < every_ms:
+            return 0
+        return self.ship(client, topic, batch, level)
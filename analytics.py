@@ -0,0 +1,311 @@
+import cmath
+import math
+from array import array
+from collections import deque
+
+from telemetry_store import GENERATION, claim_block, open_block, seqlock_read
+
+# ------------------- Streaming Analytics -------------------
+# Runs on the ingest path: every record updates O(1) rolling statistics of
+# the channels its payload carried, and every FFT_BATCH IMU records a
+# Hann-windowed FFT is taken over the latest FFT_SIZE samples of the IMU
+# channels. Results are published to a
+# small shared-memory block that dashboard workers read without recomputing.
+
+STATS_CHANNELS = [
+    "left", "center", "right",
+    "accel_x", "accel_y", "accel_z",
+    "gyro_x", "gyro_y", "gyro_z",
+]
+SPECTRUM_CHANNELS = ["accel_x", "accel_y", "accel_z", "gyro_x", "gyro_y", "gyro_z"]
+STATS = ["count", "mean", "std", "min", "max"]
+
+STATS_WINDOW = 50  # Records per rolling window
+FFT_SIZE = 64  # Samples per spectrum, power of two
+FFT_BATCH = 16  # New records between spectra
+N_BINS = FFT_SIZE // 2 + 1
+
+# (channel, statistic, threshold, message); statistic is one of STATS or
+# "peak", the largest non-DC spectral magnitude of a SPECTRUM_CHANNELS entry
+ALERT_THRESHOLDS = [
+    ("left", "std", 150.0, "Line sensor noise (left)"),
+    ("center", "std", 150.0, "Line sensor noise (center)"),
+    ("right", "std", 150.0, "Line sensor noise (right)"),
+    ("accel_z", "peak", 0.5, "Chassis vibration"),
+    ("gyro_z", "std", 60.0, "Yaw rate unstable, possible wheel slip"),
+]
+
+MAGIC = int.from_bytes(b"ALVIKAN1", "big")
+HEADER_WORDS = 8
+HEADER_SIZE = HEADER_WORDS * 8
+DEFAULT_NAME = "alvik_analytics"
+
+_SEQ, _VERSION, _N_STATS, _N_SPECTRUM, _N_BINS = 1, 2, 3, 4, 5
+
+
+# ------------------- Rolling Statistics -------------------
+class RollingStats:
+    """ Sliding-window mean, variance, min and max with O(1) updates.
+
+    Mean and variance use Welford's update, undone for the sample that
+    leaves the window; min and max use monotonic deques.
+    """
+
+    def __init__(self, window=STATS_WINDOW):
+        self.window = window
+        self.values = deque()
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._min = deque()
+        self._max = deque()
+        self._seen = 0
+
+    def update(self, x):
+        if len(self.values) == self.window:
+            old = self.values.popleft()
+            n = len(self.values)
+            if n:
+                delta = old - self.mean
+                self.mean -= delta / n
+                self._m2 -= delta * (old - self.mean)
+            else:
+                self.mean = self._m2 = 0.0
+
+        self.values.append(x)
+        delta = x - self.mean
+        self.mean += delta / len(self.values)
+        self._m2 += delta * (x - self.mean)
+
+        # Deques hold (sequence number, value); drop entries that left the window
+        seq = self._seen
+        self._seen += 1
+        while self._min and self._min[-1][1] >= x:
+            self._min.pop()
+        self._min.append((seq, x))
+        while self._max and self._max[-1][1] <= x:
+            self._max.pop()
+        self._max.append((seq, x))
+        oldest = seq - self.window
+        if self._min[0][0] <= oldest:
+            self._min.popleft()
+        if self._max[0][0] <= oldest:
+            self._max.popleft()
+
+    @property
+    def count(self):
+        return len(self.values)
+
+    @property
+    def variance(self):
+        n = len(self.values)
+        return max(self._m2, 0.0) / (n - 1) if n > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def min(self):
+        return self._min[0][1] if self._min else math.nan
+
+    @property
+    def max(self):
+        return self._max[0][1] if self._max else math.nan
+
+
+# ------------------- Spectrum -------------------
+HANN = [0.5 - 0.5 * math.cos(2 * math.pi * i / (FFT_SIZE - 1)) for i in range(FFT_SIZE)]
+
+
+def fft(values):
+    """ Iterative radix-2 FFT; len(values) must be a power of two. """
+    n = len(values)
+    out = [complex(v) for v in values]
+
+    j = 0
+    for i in range(1, n):
+        bit = n >> 1
+        while j & bit:
+            j ^= bit
+            bit >>= 1
+        j |= bit
+        if i < j:
+            out[i], out[j] = out[j], out[i]
+
+    size = 2
+    while size <= n:
+        step = cmath.exp(-2j * math.pi / size)
+        half = size // 2
+        for start in range(0, n, size):
+            w = 1
+            for k in range(start, start + half):
+                t = w * out[k + half]
+                out[k + half] = out[k] - t
+                out[k] += t
+                w *= step
+        size *= 2
+    return out
+
+
+def magnitude_spectrum(samples):
+    """ One-sided amplitude spectrum of a Hann-windowed, mean-removed window. """
+    mean = sum(samples) / len(samples)
+    coefficients = fft([(s - mean) * w for s, w in zip(samples, HANN)])
+    scale = 2 / sum(HANN)
+    return [abs(c) * scale for c in coefficients[:N_BINS]]
+
+
+# ------------------- Shared Results -------------------
+class AnalyticsBlock:
+    """ Latest statistics and spectra in shared memory, guarded by a seqlock.
+
+    Layout after the header: sample rate, then len(STATS) doubles per
+    STATS_CHANNELS entry, then N_BINS doubles per SPECTRUM_CHANNELS entry.
+    """
+
+    def __init__(self, shm):
+        self._shm = shm
+        self._header = shm.buf[:HEADER_SIZE].cast("Q")
+        if self._header[0] != MAGIC:
+            self._header.release()
+            raise ValueError(f"{shm.name} is not an analytics block")
+        self.generation = self._header[GENERATION]
+        self._values = shm.buf[HEADER_SIZE:].cast("d")
+
+    @staticmethod
+    def _size():
+        return HEADER_SIZE + 8 * (1 + len(STATS_CHANNELS) * len(STATS) + len(SPECTRUM_CHANNELS) * N_BINS)
+
+    @classmethod
+    def create(cls, name=DEFAULT_NAME):
+        shm = claim_block(name, MAGIC, cls._size())
+        header = shm.buf[:HEADER_SIZE].cast("Q")
+        header[_N_STATS] = len(STATS_CHANNELS)
+        header[_N_SPECTRUM] = len(SPECTRUM_CHANNELS)
+        header[_N_BINS] = N_BINS
+        header.release()
+        return cls(shm)
+
+    @classmethod
+    def attach(cls, name=DEFAULT_NAME):
+        shm = open_block(name)
+        try:
+            return cls(shm)
+        except ValueError:
+            shm.close()
+            raise
+
+    @property
+    def version(self):
+        return self._header[_VERSION]
+
+    def write(self, sample_rate, stats, spectra):
+        """ Publishes flat stats and, if not None, flat spectra. """
+        values = self._values
+        self._header[_SEQ] += 1
+        try:
+            values[0] = sample_rate
+            values[1:1 + len(stats)] = array("d", stats)
+            if spectra is not None:
+                offset = 1 + len(STATS_CHANNELS) * len(STATS)
+                values[offset:offset + len(spectra)] = array("d", spectra)
+            self._header[_VERSION] += 1
+        finally:
+            self._header[_SEQ] += 1
+
+    def read(self):
+        """ Returns (version, sample_rate, {channel: {stat: value}}, {channel: spectrum}). """
+        version, values = seqlock_read(self._header, _SEQ,
+                                       lambda: (self._header[_VERSION], self._values.tolist()))
+
+        stats = {}
+        offset = 1
+        for channel in STATS_CHANNELS:
+            stats[channel] = dict(zip(STATS, values[offset:offset + len(STATS)]))
+            offset += len(STATS)
+
+        spectra = {}
+        for channel in SPECTRUM_CHANNELS:
+            spectra[channel] = values[offset:offset + N_BINS]
+            offset += N_BINS
+        return version, values[0], stats, spectra
+
+    def close(self):
+        self._values.release()
+        self._header.release()
+        self._shm.close()
+
+    def unlink(self):
+        self.close()
+        self._shm.unlink()
+
+
+def frequencies(sample_rate):
+    """ Bin centre frequencies in Hz for a spectrum taken at sample_rate. """
+    return [k * sample_rate / FFT_SIZE for k in range(N_BINS)]
+
+
+def active_alerts(stats, spectra):
+    """ Returns the messages of ALERT_THRESHOLDS exceeded by the aggregates. """
+    alerts = []
+    for channel, stat, threshold, message in ALERT_THRESHOLDS:
+        if stat == "peak":
+            value = max(spectra.get(channel, [0.0])[1:], default=0.0)
+        else:
+            value = stats.get(channel, {}).get(stat, math.nan)
+        if value > threshold:
+            alerts.append(f"{message}: {channel} {stat} = {value:.2f} > {threshold:g}")
+    return alerts
+
+
+class Analytics:
+    """ Ingest-side analytics stage feeding an AnalyticsBlock. """
+
+    def __init__(self, channels, block):
+        self.block = block
+        self._indices = [channels.index(c) for c in STATS_CHANNELS]
+        self._spectrum_indices = [STATS_CHANNELS.index(c) for c in SPECTRUM_CHANNELS]
+        self._spectrum_store_indices = [channels.index(c) for c in SPECTRUM_CHANNELS]
+        self._rolling = [RollingStats() for _ in STATS_CHANNELS]
+        self._history = [deque(maxlen=FFT_SIZE) for _ in SPECTRUM_CHANNELS]
+        self._timestamps = deque(maxlen=FFT_SIZE)
+        self._pending = 0
+
+    def update(self, timestamp, values, written):
+        """ Feeds one stored record, values in telemetry channel order.
+
+        Only the channels at the store indices in written were carried by the
+        record's payload; the others hold values of earlier records and are
+        not counted again.
+        """
+        changed = False
+        for rolling, index in zip(self._rolling, self._indices):
+            if index in written and not math.isnan(values[index]):
+                rolling.update(values[index])
+                changed = True
+        if not changed:
+            return
+
+        # The spectra and their sample rate only use records with IMU samples
+        spectra = None
+        if any(index in written for index in self._spectrum_store_indices):
+            for history, index in zip(self._history, self._spectrum_indices):
+                latest = self._rolling[index].values
+                history.append(latest[-1] if latest else 0.0)
+            self._timestamps.append(timestamp)
+
+            # Spectra are batched: one FFT per channel every FFT_BATCH records
+            self._pending += 1
+            if self._pending >= FFT_BATCH and len(self._timestamps) == FFT_SIZE:
+                self._pending = 0
+                spectra = []
+                for history in self._history:
+                    spectra += magnitude_spectrum(history)
+
+        span = self._timestamps[-1] - self._timestamps[0] if self._timestamps else 0.0
+        sample_rate = (len(self._timestamps) - 1) / span if span > 0 else 0.0
+
+        stats = []
+        for rolling in self._rolling:
+            stats += (rolling.count, rolling.mean, rolling.std, rolling.min, rolling.max)
+        self.block.write(sample_rate, stats, spectra)
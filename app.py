@@ -1,116 +1,118 @@
 import dash
 from dash import dcc, html
+from flask import Response, abort, jsonify, request
 import plotly.graph_objs as go
-from dash.dependencies import Input, Output
-import paho.mqtt.client as mqtt
-import json
+from dash.dependencies import ClientsideFunction, Input, Output
+from datetime import datetime
+import os
+import re
 import threading
 import time
-import math
-from datetime import datetime
-
-# ------------------- CONFIGURAÇÃO MQTT -------------------
-MQTT_BROKER = "192.168.2.14"  # IP do Broker MQTT
-MQTT_TOPIC = "alvik/sensors"
-GRAVITY = 9.81  # Convert g to m/s²
-
-# Initialize global variables for yaw and time synchronization
-yaw = 0.0
-last_timestamp = None
-
-# ------------------- Data Storage -------------------
-data = {
-    "timestamp": [],
-    "left": [],
-    "center": [],
-    "right": [],
-    "accel_x": [],
-    "accel_y": [],
-    "accel_z": [],
-    "gyro_x": [],
-    "gyro_y": [],
-    "gyro_z": [],
-    "pose_x": [],
-    "pose_y": [],
-    "pose_theta": [],
-    "yaw": [],
-    "pitch": [],
-    "roll": [],
-}
-
-# ------------------- Compute Angles -------------------
-def compute_angles(accel_x, accel_y, accel_z, gyro_z, dt):
-    global yaw
 
-    # Compute Pitch and Roll using accelerometer
-    pitch = math.degrees(math.atan2(-accel_x, math.sqrt(accel_y**2 + accel_z**2)))
-    roll = math.degrees(math.atan2(accel_y, math.sqrt(accel_x**2 + accel_z**2)))
+import export
+import ingest
+from analytics import AnalyticsBlock, SPECTRUM_CHANNELS, STATS_CHANNELS, active_alerts, frequencies
+from figure_cache import FigureCache
+from telemetry_store import TelemetryStore, block_generation
+from trajectory import PathBlock, TrajectoryIndex
 
-    # Integrate Gyro Z to estimate Yaw
-    yaw += gyro_z * dt
+WINDOW = 100  # Number of records plotted
+PANEL_CHANNELS = {
+    "left", "center", "right", "accel_x", "accel_y", "accel_z",
+    "yaw", "pitch", "roll", "pose_x", "pose_y", "pose_theta",
+    "robot_timestamp",  # Not a plottable value; kept for exports
+}  # Channels with a fixed panel; any other channel goes to the channels graph
+TRAJECTORY_MAX_POINTS = 2000  # Point budget of the trajectory map per viewport
 
-    # Normalize Yaw to [-180, 180]
-    yaw = (yaw + 180) % 360 - 180
+figure_cache = FigureCache(maxsize=64)
 
-    return pitch, roll, yaw
-
-# ------------------- MQTT Callback Function -------------------
-def on_message(client, _, msg):
-    global data, last_timestamp
-
-    try:
-        payload_raw = msg.payload.decode()
-        payload = json.loads(payload_raw)  # Decode JSON
-        timestamp_str = payload.get("timestamp", time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()))  # Convert timestamp
-
-        # Ensure time updates happen at 1-second intervals
-        if last_timestamp is None:
-            last_timestamp = timestamp_str
-
-        dt = 1  # Fix sampling interval to 1 sec
-        last_timestamp = timestamp_str
-
-        # Convert accelerometer values from g to m/s²
-        accel_x = payload.get("accel_x", 0) * GRAVITY
-        accel_y = payload.get("accel_y", 0) * GRAVITY
-        accel_z = payload.get("accel_z", 0) * GRAVITY
-        gyro_z = payload.get("gyro_z", 0)
-
-        # Compute angles
-        pitch, roll, yaw_value = compute_angles(accel_x, accel_y, accel_z, gyro_z, dt)
-
-        # Store new data points
-        for key in data.keys():
-            if key in payload:
-                data[key].append(payload[key])
-            else:
-                # Fill missing values with last known or zero
-                data[key].append(data[key][-1] if data[key] else 0)
-
-        # Store computed angles
-        data["pitch"].append(pitch)
-        data["roll"].append(roll)
-        data["yaw"].append(yaw_value)
-
-        # Store timestamp
-        data["timestamp"].append(timestamp_str)
-
-        # Keep only the last 100 records to avoid overload
-        for key in data.keys():
-            data[key] = data[key][-100:]
-
-    except json.JSONDecodeError as e:
-        print(f"❌ JSON Decode Error: {e} - Raw Message: {payload_raw}")
-
-# ------------------- Start MQTT in a Separate Thread -------------------
-def connect_mqtt():
-    client = mqtt.Client()
-    client.on_message = on_message
-    client.connect(MQTT_BROKER, 1883, 60)
-    client.subscribe(MQTT_TOPIC)
-    client.loop_start()  # Run in the background
-
-threading.Thread(target=connect_mqtt, daemon=True).start()
+# ------------------- Data Storage -------------------
+# Telemetry lives in shared memory written by ingest.py, so any number of
+# dashboard workers can serve the same data without their own MQTT client.
+REATTACH_INTERVAL = 1.0  # Seconds between checks for a restarted ingest
+
+class SharedBlock:
+    """ Worker-side mapping of an ingest block that follows ingest restarts.
+
+    A restarted ingest creates a new block under the same name; the block's
+    generation stamp tells the worker to map the new one.
+    """
+
+    def __init__(self, cls, name):
+        self.cls = cls
+        self.name = name
+        self.block = None
+        self._checked = 0.0
+        self._retired = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self.block is not None and time.monotonic() - self._checked < REATTACH_INTERVAL:
+            return self.block
+
+        with self._lock:
+            now = time.monotonic()
+            if self.block is not None and now - self._checked < REATTACH_INTERVAL:
+                return self.block
+            self._checked = now
+
+            generation = block_generation(self.name)
+            if generation is None:
+                return self.block  # Ingest not running (yet): keep the last data, if any
+            if self.block is not None and generation == self.block.generation:
+                return self.block
+
+            try:
+                fresh = self.cls.attach(self.name)
+            except (FileNotFoundError, ValueError):
+                return self.block
+
+            # Requests may still be reading the old mapping; close it on the next swap
+            for old in self._retired:
+                old.close()
+            self._retired = [self.block] if self.block is not None else []
+            self.block = fresh
+            return fresh
+
+store_block = SharedBlock(TelemetryStore, ingest.STORE_NAME)
+
+def get_store():
+    return store_block.get()
+
+# Rolling statistics and spectra precomputed by the ingest process
+analytics_block = SharedBlock(AnalyticsBlock, ingest.ANALYTICS_NAME)
+
+def get_analytics():
+    return analytics_block.get()
+
+# Driven path of the whole run, kept by the ingest process. Each worker
+# indexes it incrementally, so every worker serves the same trajectory.
+path_block = SharedBlock(PathBlock, ingest.PATH_NAME)
+
+def get_path():
+    return path_block.get()
+
+trajectory = TrajectoryIndex()
+trajectory_generation = None
+trajectory_version = (0, 0)  # (epoch, count) of the path indexed so far
+trajectory_lock = threading.Lock()
+
+def sync_trajectory(block):
+    global trajectory, trajectory_generation, trajectory_version
+
+    with trajectory_lock:
+        epoch, position = trajectory_version
+        if block.generation != trajectory_generation:
+            # New ingest run: start a new path
+            trajectory_generation = block.generation
+            epoch, position = None, 0
+
+        new_epoch, count, xs, ys = block.read_since(position, epoch)
+        if new_epoch != epoch:
+            # First sync, new run, or the ingest halved the history
+            trajectory = TrajectoryIndex()
+        trajectory.extend(xs, ys)
+        trajectory_version = (new_epoch, count)
 
 # ------------------- DASHBOARD DASH -------------------
 app = dash.Dash(__name__)
@@ -128,6 +130,24 @@ app.layout = html.Div([
         html.Div([dcc.Graph(id="pose-graph")], className="six columns"),
     ], className="row"),
 
+    html.Div(id="alerts", style={"color": "orange", "fontSize": "18px", "padding": "0 20px"}),
+
+    html.Div([
+        html.Div([dcc.Graph(id="stats-graph")], className="six columns"),
+        html.Div([dcc.Graph(id="spectrum-graph")], className="six columns"),
+    ], className="row"),
+
+    html.Div([
+        html.Div([dcc.Graph(id="trajectory-graph", style={"height": "600px"})], className="twelve columns"),
+    ], className="row"),
+
+    # Every channel without a fixed panel above, e.g. from line_follower_pd_mqtt.py
+    html.Div([
+        dcc.Dropdown(id="channel-select", multi=True, placeholder="All other channels",
+                     style={"color": "black"}),
+        dcc.Graph(id="channels-graph"),
+    ], className="row"),
+
     dcc.Interval(id="interval-component", interval=1000, n_intervals=0)  # Update every second
 ], style={"backgroundColor": "black", "color": "white"})
 
@@ -138,7 +158,7 @@ def generate_line_plot(title, x_data, y_data, y_labels):
     fig = go.Figure()
     
     # Convert timestamps to datetime format for proper x-axis formatting
-    x_data = [datetime.strptime(t, "%Y-%m-%d %H:%M:%S") for t in x_data]
+    x_data = [datetime.fromtimestamp(t) for t in x_data]
 
     for y, label in zip(y_data, y_labels):
         fig.add_trace(go.Scatter(x=x_data, y=y, mode="lines", name=label))
@@ -150,53 +170,241 @@ def generate_line_plot(title, x_data, y_data, y_labels):
                       xaxis=dict(tickformat="%H:%M:%S"))  # Show time in HH:MM:SS format
     return fig
 
-# Update Sensor Graph (Left, Center, Right)
-@app.callback(Output("sensor-graph", "figure"), Input("interval-component", "n_intervals"))
-def update_sensor_graph(_):
-    if not data["timestamp"]:
-        return go.Figure()
-
-    return generate_line_plot(
-        "Line Sensors", data["timestamp"], 
+# Time series figures depend only on the store version, so each one is built
+# and serialized once per version and served to every viewer as the same JSON
+STORE_FIGURES = {
+    # Sensor Graph (Left, Center, Right)
+    "sensor-graph": lambda data: generate_line_plot(
+        "Line Sensors", data["timestamp"],
         [data["left"], data["center"], data["right"]],
         ["Left", "Center", "Right"]
-    )
-
-# Update Accelerometer Graph (X, Y, Z in m/s²)
-@app.callback(Output("accel-graph", "figure"), Input("interval-component", "n_intervals"))
-def update_accel_graph(_):
-    if not data["timestamp"]:
-        return go.Figure()
-
-    return generate_line_plot(
-        "Acceleration (m/s²)", data["timestamp"], 
+    ),
+    # Accelerometer Graph (X, Y, Z in m/s²)
+    "accel-graph": lambda data: generate_line_plot(
+        "Acceleration (m/s²)", data["timestamp"],
         [data["accel_x"], data["accel_y"], data["accel_z"]],
         ["Accel X", "Accel Y", "Accel Z"]
-    )
+    ),
+    # Gyro Angles (Yaw, Pitch, Roll) from MQTT Data
+    "gyro-angles-graph": lambda data: generate_line_plot(
+        "Yaw, Pitch, Roll Angles", data["timestamp"],
+        [data["yaw"], data["pitch"], data["roll"]],
+        ["Yaw (Theta)", "Pitch", "Roll"]
+    ),
+    # Pose Graph (X, Y, Theta)
+    "pose-graph": lambda data: generate_line_plot(
+        "Robot Pose", data["timestamp"],
+        [data["pose_x"], data["pose_y"], data["pose_theta"]],
+        ["Pose X", "Pose Y", "Pose Theta"]
+    ),
+}
 
-# Update Gyro Angles (Yaw, Pitch, Roll) from MQTT Data
-@app.callback(Output("gyro-angles-graph", "figure"), Input("interval-component", "n_intervals"))
-def update_gyro_angles_graph(_):
-    if not data["timestamp"]:
+# Returns ((generation, version), cache entry) for a shared figure, or None if there is no data yet
+def shared_figure(graph_id):
+    if graph_id in STORE_FIGURES:
+        store = get_store()
+        if store is None or not store.version:
+            return None
+
+        version = (store.generation, store.version)
+        build = STORE_FIGURES[graph_id]
+        return version, figure_cache.get((graph_id, version, WINDOW),
+                                         lambda: build(store.snapshot(WINDOW)[1]))
+
+    if graph_id in ANALYTICS_FIGURES:
+        block = get_analytics()
+        if block is None or not block.version:
+            return None
+
+        version = (block.generation, block.version)
+        build = ANALYTICS_FIGURES[graph_id]
+        return version, figure_cache.get((graph_id, version, None),
+                                         lambda: build(*block.read()[1:]))
+
+    return None
+
+# Update Channel Selector with channels the store has discovered
+@app.callback(Output("channel-select", "options"), Input("interval-component", "n_intervals"))
+def update_channel_options(_):
+    store = get_store()
+    if store is None:
+        return []
+
+    return [channel for channel in store.channels if channel not in PANEL_CHANNELS]
+
+# Update Channels Graph (selected channels, or every channel without a panel)
+@app.callback(Output("channels-graph", "figure"),
+              [Input("interval-component", "n_intervals"), Input("channel-select", "value")])
+def update_channels_graph(_, selected):
+    store = get_store()
+    if store is None or not store.version:
         return go.Figure()
 
-    return generate_line_plot(
-        "Yaw, Pitch, Roll Angles", data["timestamp"], 
-        [data["yaw"], data["pitch"], data["roll"]],  
-        ["Yaw (Theta)", "Pitch", "Roll"]
-    )
+    channels = tuple(selected or (c for c in store.channels if c not in PANEL_CHANNELS))
+
+    def build():
+        _, data = store.snapshot(WINDOW)
+        return generate_line_plot("Other Channels", data["timestamp"],
+                                  [data[c] for c in channels if c in data], channels)
+
+    return figure_cache.get(("channels-graph", (store.generation, store.version), (WINDOW, channels)),
+                            build).figure
+
+# Parse the zoomed axis ranges out of a graph's relayoutData
+def viewport(relayout_data):
+    relayout_data = relayout_data or {}
+    ranges = []
+    for axis in ("xaxis", "yaxis"):
+        if f"{axis}.range[0]" in relayout_data:
+            ranges.append((relayout_data[f"{axis}.range[0]"], relayout_data[f"{axis}.range[1]"]))
+        elif f"{axis}.range" in relayout_data:
+            ranges.append(tuple(relayout_data[f"{axis}.range"]))
+        else:
+            ranges.append(None)
+    return tuple(ranges)
 
-# Update Pose Graph (X, Y, Theta)
-@app.callback(Output("pose-graph", "figure"), Input("interval-component", "n_intervals"))
-def update_pose_graph(_):
-    if not data["timestamp"]:
+def generate_trajectory_plot(x_range, y_range):
+    xs, ys = trajectory.query(x_range, y_range, max_points=TRAJECTORY_MAX_POINTS)
+
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(x=xs, y=ys, mode="lines+markers", marker=dict(size=3), name="Path"))
+    if trajectory.xs:
+        fig.add_trace(go.Scattergl(x=[trajectory.xs[-1]], y=[trajectory.ys[-1]], mode="markers",
+                                   marker=dict(size=12, color="red"), name="Robot"))
+
+    fig.update_yaxes(scaleanchor="x", scaleratio=1)
+    shown = sum(x is not None for x in xs)  # xs has None where the path is broken
+    fig.update_layout(title=f"Trajectory ({shown} of {len(trajectory)} poses)",
+                      xaxis_title="Pose X", yaxis_title="Pose Y",
+                      template="plotly_dark", plot_bgcolor="black", paper_bgcolor="black",
+                      uirevision="trajectory")  # Keep the user's zoom across refreshes
+    return fig
+
+# Update Trajectory Map (Pose X vs Pose Y), decimated for the current viewport
+@app.callback(Output("trajectory-graph", "figure"),
+              [Input("interval-component", "n_intervals"), Input("trajectory-graph", "relayoutData")])
+def update_trajectory_graph(_, relayout_data):
+    block = get_path()
+    if block is None:
         return go.Figure()
 
-    return generate_line_plot(
-        "Robot Pose", data["timestamp"], 
-        [data["pose_x"], data["pose_y"], data["pose_theta"]],
-        ["Pose X", "Pose Y", "Pose Theta"]
+    sync_trajectory(block)
+    x_range, y_range = viewport(relayout_data)
+    return figure_cache.get(("trajectory-graph", (trajectory_generation,) + trajectory_version, (x_range, y_range)),
+                            lambda: generate_trajectory_plot(x_range, y_range)).figure
+
+def generate_stats_plot(_, stats, __):
+    # A table keeps every channel visible, including constant ones with std 0
+    columns = [[channel for channel in STATS_CHANNELS]]
+    for stat in ("count", "mean", "std", "min", "max"):
+        columns.append([f"{stats[channel][stat]:.4g}" for channel in STATS_CHANNELS])
+
+    fig = go.Figure(go.Table(
+        header=dict(values=["Channel", "Count", "Mean", "Std Dev", "Min", "Max"],
+                    fill_color="#222", font=dict(color="white"), align="left"),
+        cells=dict(values=columns, fill_color="black", font=dict(color="white"), align="left"),
+    ))
+    fig.update_layout(title="Rolling Statistics", template="plotly_dark",
+                      plot_bgcolor="black", paper_bgcolor="black")
+    return fig
+
+def generate_spectrum_plot(sample_rate, _, spectra):
+    fig = go.Figure()
+    x_data = frequencies(sample_rate)
+    for channel in SPECTRUM_CHANNELS:
+        fig.add_trace(go.Scatter(x=x_data, y=spectra[channel], mode="lines", name=channel))
+
+    fig.update_layout(title=f"IMU Spectrum ({sample_rate:.1f} Hz sampling)",
+                      xaxis_title="Frequency (Hz)", yaxis_title="Amplitude",
+                      template="plotly_dark", plot_bgcolor="black", paper_bgcolor="black")
+    return fig
+
+# Rolling Statistics (precomputed by ingest) and Spectrum of the IMU channels
+ANALYTICS_FIGURES = {
+    "stats-graph": generate_stats_plot,
+    "spectrum-graph": generate_spectrum_plot,
+}
+
+# Shared figures are fetched by the browser from /figures/<id>.json
+# (assets/figures.js), so the server never re-serializes them per viewer
+for graph_id in list(STORE_FIGURES) + list(ANALYTICS_FIGURES):
+    app.clientside_callback(
+        ClientsideFunction(namespace="figures", function_name="fetch"),
+        Output(graph_id, "figure"),
+        Input("interval-component", "n_intervals"),
     )
 
+# Update Alerts from the analytics thresholds
+@app.callback(Output("alerts", "children"), Input("interval-component", "n_intervals"))
+def update_alerts(_):
+    block = get_analytics()
+    if block is None or not block.version:
+        return []
+
+    _, _, stats, spectra = block.read()
+    return [html.P(f"⚠ {alert}") for alert in active_alerts(stats, spectra)]
+
+# ------------------- FIGURE CACHE ENDPOINTS -------------------
+
+# Serialized figure shared by every viewer of the current data version.
+# Per-session figures (trajectory viewport, channel selection) are not served here.
+@app.server.route("/figures/<graph_id>.json")
+def figure_json(graph_id):
+    shared = shared_figure(graph_id)
+    if shared is None:
+        abort(404)
+
+    version, entry = shared
+    etag = f"{graph_id}-{version[0]}-{version[1]}"
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = Response(entry.json, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@app.server.route("/metrics/figure-cache")
+def figure_cache_metrics():
+    return jsonify(figure_cache.stats())
+
+# ------------------- EXPORT ENDPOINT -------------------
+
+# Stream a robot's telemetry window, e.g. /export/alvik.parquet?start=2025-02-08 21:00:00
+@app.server.route("/export/<robot>.<fmt>")
+def export_telemetry(robot, fmt):
+    if fmt not in export.FORMATS or not re.fullmatch(r"[A-Za-z0-9_]+", robot):
+        abort(404)
+    if export.pa is None:
+        abort(501, "pyarrow is required for telemetry export")
+
+    try:
+        start = export.parse_time(request.args.get("start"))
+        end = export.parse_time(request.args.get("end"))
+    except ValueError:
+        abort(400, 'start/end must be epoch seconds or "YYYY-MM-DD HH:MM:SS"')
+
+    try:
+        robot_store = TelemetryStore.attach(robot)
+    except (FileNotFoundError, ValueError):
+        abort(404)
+
+    def generate():
+        try:
+            yield from export.stream_export(robot_store, fmt, start, end)
+        finally:
+            robot_store.close()
+
+    response = Response(generate(), mimetype=export.FORMATS[fmt])
+    response.headers["Content-Disposition"] = f"attachment; filename={robot}.{'arrows' if fmt == 'arrow' else fmt}"
+    return response
+
 if __name__ == "__main__":
+    # Development server: run ingest in this process instead of ingest.py.
+    # The reloader child re-runs this block and attaches to the parent's store.
+    if os.environ.get("WERKZEUG_RUN_MAIN") != "true":
+        try:
+            ingest.start()
+        except RuntimeError as e:
+            print(f"ℹ Using the running ingest process ({e})")
     app.run_server(debug=True, port=8080)
@@ -0,0 +1,25 @@
+// Fetches shared figures from /figures/<graph id>.json (see app.py).
+// The server builds and serializes each figure once per data version; the
+// ETag of the last figure received is sent back so unchanged figures cost a
+// 304 and no re-render.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    figures: {
+        fetch: function () {
+            const id = window.dash_clientside.callback_context.outputs_list.id;
+            const etags = window.alvikFigureEtags = window.alvikFigureEtags || {};
+            const headers = etags[id] ? {"If-None-Match": etags[id]} : {};
+
+            return fetch("/figures/" + id + ".json", {headers: headers, cache: "no-store"})
+                .then(function (response) {
+                    if (response.status !== 200) {
+                        return window.dash_clientside.no_update;  // 304 or no data yet
+                    }
+                    etags[id] = response.headers.get("ETag");
+                    return response.json();
+                })
+                .catch(function () {
+                    return window.dash_clientside.no_update;
+                });
+        }
+    }
+});
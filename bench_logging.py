@@ -0,0 +1,138 @@
+import argparse
+import io
+import json
+import sys
+import time
+
+from alvik_log import Logger, DEBUG, INFO
+
+# ------------------- LOGGING BENCHMARK -------------------
+# Runs the control-loop logging patterns of the robot scripts under CPython,
+# once with the old per-iteration prints and once with alvik_log as the
+# scripts now call it, and reports the mean loop time. The serial console is
+# emulated by a stream that blocks for the time the bytes would take on the
+# wire at the given baud rate, and MQTT publishes block for their bytes at
+# the given link throughput.
+
+
+class SerialConsole(io.TextIOBase):
+    """ stdout replacement that costs 10 bits of wire time per byte. """
+
+    def __init__(self, baud):
+        self.seconds_per_byte = 10 / baud
+
+    def write(self, text):
+        time.sleep(len(text.encode()) * self.seconds_per_byte)
+        return len(text)
+
+
+class FakeClient:
+    """ MQTT client whose blocking publish costs time per byte sent. """
+
+    def __init__(self, bytes_per_second):
+        self.seconds_per_byte = 1 / bytes_per_second
+        self.messages = 0
+
+    def publish(self, topic, message):
+        self.messages += 1
+        time.sleep((len(topic) + len(message)) * self.seconds_per_byte)
+
+
+def sample_payload(i):
+    return {
+        "timestamp": "2025-02-08 21:13:34", "left": 120 + i % 7, "center": 480, "right": 95,
+        "accel_x": -0.0123, "accel_y": 0.0045, "accel_z": -0.9981,
+        "gyro_x": 0.1221, "gyro_y": -0.061, "gyro_z": 1.2817, "speed": [19.8, 20.1],
+        "pose_x": 12.3456, "pose_y": -3.2109, "pose_theta": 4.5678,
+        "yaw": 0, "pitch": -0.0123, "roll": 0.0045,
+    }
+
+
+def pd_payload(i):
+    return {
+        "line_sensors": [120 + i % 7, 480, 95], "left_speed": 19.8, "right_speed": 20.1,
+        "error": 0.0123, "derivative": -0.0045, "control": 0.8123, "kp": 60.0, "kd": 15.0,
+        "ToF_T": 120, "ToF_B": 45, "ToF_L": 300, "ToF_CL": 250, "ToF_C": 180, "ToF_CR": 260, "ToF_R": 310,
+        "kp_f": 0.738, "kd_f": -0.0675,
+    }
+
+
+# line_follower.py: publish the payload, log it, ship pending logs
+def line_follower_print(iterations, client):
+    for i in range(iterations):
+        json_payload = json.dumps(sample_payload(i))
+        client.publish("alvik/sensors", json_payload)
+        print("📡 Enviado MQTT:", json_payload)
+
+
+def line_follower_logger(iterations, client):
+    log = Logger("line_follower", level=DEBUG)
+    for i in range(iterations):
+        json_payload = json.dumps(sample_payload(i))
+        client.publish("alvik/sensors", json_payload)
+        log.debug("📡 Enviado MQTT: %s", json_payload)
+        log.maybe_ship(client, "alvik/logs", level=INFO)
+
+
+# line_follower_pd_mqtt.py: log the ToF readings, publish and log the message;
+# the script subscribes to its own topic, so every message also comes back
+# to mqtt_callback on the next check_msg()
+def line_follower_pd_print(iterations, client):
+    for i in range(iterations):
+        T, B, L, CL, C, CR, R = 120, 45, 300, 250, 180, 260, 310
+        print(f'T: {T} | B: {B} | L: {L} | CL: {CL} | C: {C} | CR: {CR} | R: {R}')
+        message = json.dumps(pd_payload(i))
+        client.publish("alvik", message)
+        print(f"Message '{message}' sent to topic 'alvik'")
+        json.loads(message)
+        print("Failed to update PID constants: name 'ki' isn't defined")  # ki was never set
+
+
+def line_follower_pd_logger(iterations, client):
+    log = Logger("line_follower_pd", level=DEBUG)
+    for i in range(iterations):
+        T, B, L, CL, C, CR, R = 120, 45, 300, 250, 180, 260, 310
+        log.debug('T: %s | B: %s | L: %s | CL: %s | C: %s | CR: %s | R: %s', T, B, L, CL, C, CR, R, every_ms=1000)
+        message = json.dumps(pd_payload(i))
+        client.publish("alvik", message)
+        log.debug("Message '%s' sent to topic '%s'", message, "alvik")
+        if "line_sensors" in json.loads(message):
+            continue  # Own telemetry echo, ignored
+
+
+SCENARIOS = [
+    ("line_follower", line_follower_print, line_follower_logger),
+    ("line_follower_pd", line_follower_pd_print, line_follower_pd_logger),
+]
+
+
+def timed(func, iterations, baud, mqtt_rate):
+    client = FakeClient(mqtt_rate)
+    stdout = sys.stdout
+    sys.stdout = SerialConsole(baud)
+    try:
+        start = time.perf_counter()
+        func(iterations, client)
+        return (time.perf_counter() - start) / iterations * 1000, client.messages
+    finally:
+        sys.stdout = stdout
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark loop time with print vs alvik_log.")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--baud", type=int, default=115200, help="emulated serial console speed")
+    parser.add_argument("--mqtt-rate", type=int, default=100000, help="emulated MQTT bytes per second")
+    args = parser.parse_args(argv)
+
+    for name, with_print, with_logger in SCENARIOS:
+        printed, printed_messages = timed(with_print, args.iterations, args.baud, args.mqtt_rate)
+        logged, logged_messages = timed(with_logger, args.iterations, args.baud, args.mqtt_rate)
+        print(f"{name}:")
+        print(f"  print:     {printed:.3f} ms/iteration, {printed_messages} MQTT messages")
+        print(f"  alvik_log: {logged:.3f} ms/iteration, {logged_messages} MQTT messages")
+        print(f"  saved:     {printed - logged:.3f} ms/iteration")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import argparse
+import sys
+import time
+
+from telemetry_store import TelemetryStore
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Only needed for exports
+    pa = pq = None
+
+# ------------------- Telemetry Export -------------------
+# Streams a robot's telemetry window to Arrow IPC or Parquet for offline
+# analysis in pandas/Polars. Each chunk is copied out of shared memory once,
+# under the store's seqlock, and handed to Arrow without a second copy; the
+# ingest process never waits on an export.
+
+FORMATS = {"arrow": "application/vnd.apache.arrow.stream", "parquet": "application/vnd.apache.parquet"}
+CHUNK_ROWS = 4096
+
+
+def parse_time(value):
+    """ Accepts epoch seconds or "%Y-%m-%d %H:%M:%S" local time; None is open. """
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return time.mktime(time.strptime(value, "%Y-%m-%d %H:%M:%S"))
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("pyarrow is required for telemetry export (pip install pyarrow)")
+
+
+def export_schema(channels):
+    """ Arrow schema of an export: epoch-second receipt times plus one column per channel. """
+    _require_pyarrow()
+    return pa.schema([("timestamp", pa.float64())] + [(name, pa.float64()) for name in channels])
+
+
+def iter_batches(store, start=None, end=None, chunk_rows=CHUNK_ROWS):
+    """ Yields (schema, RecordBatch) chunks of records with start <= timestamp < end.
+
+    The range is found by binary search, which relies on ingest.py storing
+    non-decreasing timestamps.
+    """
+    _require_pyarrow()
+
+    channels = store.channels
+    schema = export_schema(channels)
+    position = store.find(start) if start is not None else 0
+    stop = store.find(end) if end is not None else store.version
+
+    while position < stop:
+        first, columns = store.read_columns(position, min(position + chunk_rows, stop), len(channels))
+        rows = len(columns[0]) // 8
+        if not rows:
+            break
+
+        # Arrow wraps the copied buffers as-is: no further copy per column
+        arrays = [pa.Array.from_buffers(pa.float64(), rows, [None, pa.py_buffer(column)])
+                  for column in columns]
+        yield schema, pa.RecordBatch.from_arrays(arrays, schema=schema)
+        position = first + rows
+
+
+class _ChunkSink:
+    """ Write-only file object whose contents are drained after every batch. """
+
+    def __init__(self):
+        self.closed = False
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _open_writer(fmt, sink, schema):
+    if fmt == "arrow":
+        return pa.ipc.new_stream(sink, schema)
+    if fmt == "parquet":
+        return pq.ParquetWriter(sink, schema)
+    raise ValueError(f"unknown export format: {fmt} (expected one of {', '.join(FORMATS)})")
+
+
+def write_export(store, sink, fmt="arrow", start=None, end=None, chunk_rows=CHUNK_ROWS):
+    """ Writes the selected window to a file object; returns the number of rows. """
+    _require_pyarrow()
+
+    rows = 0
+    writer = None
+    for schema, batch in iter_batches(store, start, end, chunk_rows):
+        if writer is None:
+            writer = _open_writer(fmt, sink, schema)
+        writer.write_batch(batch)
+        rows += batch.num_rows
+
+    if writer is None:
+        # Empty window: still produce a valid file with the store's schema
+        writer = _open_writer(fmt, sink, export_schema(store.channels))
+    writer.close()
+    return rows
+
+
+def stream_export(store, fmt="arrow", start=None, end=None, chunk_rows=CHUNK_ROWS):
+    """ Generator of encoded bytes, for chunked HTTP responses. """
+    _require_pyarrow()
+
+    sink = _ChunkSink()
+    writer = None
+    for schema, batch in iter_batches(store, start, end, chunk_rows):
+        if writer is None:
+            writer = _open_writer(fmt, sink, schema)
+        writer.write_batch(batch)
+        data = sink.drain()
+        if data:
+            yield data
+
+    if writer is None:
+        writer = _open_writer(fmt, sink, export_schema(store.channels))
+    writer.close()
+    yield sink.drain()
+
+
+# ------------------- CLI -------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export Alvik telemetry to Arrow IPC or Parquet.")
+    parser.add_argument("--robot", default="alvik", help="telemetry store name (default: alvik)")
+    parser.add_argument("--start", help='first timestamp, epoch seconds or "YYYY-MM-DD HH:MM:SS"')
+    parser.add_argument("--end", help="end timestamp (exclusive), same formats as --start")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="parquet")
+    parser.add_argument("-o", "--output", required=True, help="output file")
+    args = parser.parse_args(argv)
+
+    try:
+        start, end = parse_time(args.start), parse_time(args.end)
+    except ValueError:
+        print('❌ --start/--end must be epoch seconds or "YYYY-MM-DD HH:MM:SS"')
+        return 1
+
+    if pa is None:
+        print("❌ pyarrow is required for telemetry export (pip install pyarrow)")
+        return 1
+
+    try:
+        store = TelemetryStore.attach(args.robot)
+    except FileNotFoundError:
+        print(f"❌ No telemetry store named '{args.robot}'. Is ingest.py running?")
+        return 1
+    except ValueError:
+        print(f"❌ '{args.robot}' is not a telemetry store.")
+        return 1
+
+    try:
+        with open(args.output, "wb") as f:
+            rows = write_export(store, f, args.format, start, end)
+    finally:
+        store.close()
+
+    print(f"✅ Exported {rows} records from '{args.robot}' to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+import threading
+from collections import OrderedDict
+
+# ------------------- Figure Cache -------------------
+# Shared between every browser session served by this process. Keys are
+# (graph id, data version, window) so a figure is built once per new sample,
+# no matter how many dashboards are polling it.
+
+
+class CachedFigure:
+    """A built figure plus its JSON payload, serialized on first request."""
+
+    __slots__ = ("figure", "_json", "_lock")
+
+    def __init__(self, figure):
+        self.figure = figure
+        self._json = None
+        self._lock = threading.Lock()
+
+    @property
+    def json(self):
+        if self._json is None:
+            with self._lock:
+                if self._json is None:
+                    self._json = self.figure.to_json()
+        return self._json
+
+
+class FigureCache:
+    """ Bounded LRU cache of figures with single-flight builds. """
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._building = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, build):
+        """ Returns the cached entry for key, calling build() only on a miss.
+
+        Concurrent callers asking for the same missing key wait for the one
+        build already in flight instead of starting their own.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+            pending = self._building.get(key)
+            if pending is None:
+                pending = self._building[key] = threading.Event()
+                owner = True
+                self.misses += 1
+            else:
+                owner = False
+                self.hits += 1
+
+        if not owner:
+            pending.wait()
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None:
+                return entry
+            # The owner failed or the entry was already evicted: build locally
+            return CachedFigure(build())
+
+        try:
+            entry = CachedFigure(build())
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            return entry
+        finally:
+            with self._lock:
+                del self._building[key]
+            pending.set()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,164 @@
+import paho.mqtt.client as mqtt
+import json
+import os
+import time
+import math
+
+from analytics import Analytics, AnalyticsBlock
+from schemas import SchemaRegistry
+from telemetry_store import TelemetryWriter, DEFAULT_CAPACITY
+from trajectory import PathBlock
+
+# ------------------- CONFIGURAÇÃO MQTT -------------------
+MQTT_BROKER = "192.168.2.14"  # IP do Broker MQTT
+MQTT_TOPICS = [
+    "alvik/sensors",  # line_follower.py
+    "alvik",  # line_follower_pd_mqtt.py
+]
+GRAVITY = 9.81  # Convert g to m/s²
+
+# ------------------- Telemetry Store -------------------
+# Single writer shared with every dashboard worker (see telemetry_store.py).
+# CHANNELS are created up front for the fixed dashboard panels and analytics;
+# any other payload field is added as a channel when first received.
+STORE_NAME = os.environ.get("ALVIK_STORE", "alvik")
+STORE_CAPACITY = int(os.environ.get("ALVIK_STORE_CAPACITY", DEFAULT_CAPACITY))
+ANALYTICS_NAME = STORE_NAME + "_analytics"
+PATH_NAME = STORE_NAME + "_path"  # Whole-run pose history for the trajectory map
+
+CHANNELS = [
+    "left",
+    "center",
+    "right",
+    "accel_x",
+    "accel_y",
+    "accel_z",
+    "gyro_x",
+    "gyro_y",
+    "gyro_z",
+    "pose_x",
+    "pose_y",
+    "pose_theta",
+    "yaw",
+    "pitch",
+    "roll",
+    "robot_timestamp",  # The robot's own clock, as epoch seconds; NaN if not sent
+]
+ROBOT_TIMESTAMP = CHANNELS.index("robot_timestamp")
+POSE_X, POSE_Y = CHANNELS.index("pose_x"), CHANNELS.index("pose_y")
+
+# Initialize global variable for yaw integration
+yaw = 0.0
+
+store = None
+analytics = None
+registry = None
+path = None
+last_values = [math.nan] * len(CHANNELS)  # NaN until a payload carries the channel
+last_stored = [0.0]  # Receipt time of the latest stored record
+
+# ------------------- Compute Angles -------------------
+def compute_angles(accel_x, accel_y, accel_z, gyro_z, dt):
+    global yaw
+
+    # Compute Pitch and Roll using accelerometer
+    pitch = math.degrees(math.atan2(-accel_x, math.sqrt(accel_y**2 + accel_z**2)))
+    roll = math.degrees(math.atan2(accel_y, math.sqrt(accel_x**2 + accel_z**2)))
+
+    # Integrate Gyro Z to estimate Yaw
+    yaw += gyro_z * dt
+
+    # Normalize Yaw to [-180, 180]
+    yaw = (yaw + 180) % 360 - 180
+
+    return pitch, roll, yaw
+
+# Pitch, roll and yaw of the line follower stream, from its raw IMU fields
+def derive_angles(accel_x, accel_y, accel_z, gyro_z):
+    dt = 1  # Fix sampling interval to 1 sec
+
+    # Convert accelerometer values from g to m/s²
+    return compute_angles(accel_x * GRAVITY, accel_y * GRAVITY, accel_z * GRAVITY, gyro_z, dt)
+
+# Payload timestamps have one-second resolution, so consecutive messages repeat them
+_timestamp_cache = (None, None)
+
+def parse_timestamp(timestamp_str):
+    global _timestamp_cache
+
+    if timestamp_str is None:
+        return math.nan
+    if _timestamp_cache[0] != timestamp_str:
+        _timestamp_cache = (timestamp_str, time.mktime(time.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")))
+    return _timestamp_cache[1]
+
+# ------------------- MQTT Callback Function -------------------
+def on_message(client, _, msg):
+    try:
+        payload_raw = msg.payload.decode()
+        payload = json.loads(payload_raw)  # Decode JSON
+        if not isinstance(payload, dict):
+            raise ValueError("payload is not a JSON object")
+
+        # Records are stored at their receipt time: one clock for every topic,
+        # non-decreasing (even across a wall clock step back) so time-range
+        # lookups can binary search. The robot's own timestamp, if any, is
+        # kept as a channel.
+        timestamp = max(time.time(), last_stored[0])
+        last_stored[0] = timestamp
+
+        # Channels missing from this payload keep their last known value
+        decoder = registry.decode(msg.topic, payload, last_values)
+        last_values[ROBOT_TIMESTAMP] = parse_timestamp(payload.get("timestamp"))
+
+        store.append(timestamp, last_values)
+        if "pose_x" in decoder.columns and "pose_y" in decoder.columns:
+            path.append(last_values[POSE_X], last_values[POSE_Y])
+        analytics.update(timestamp, last_values, decoder.indices)
+
+    except json.JSONDecodeError as e:
+        print(f"❌ JSON Decode Error: {e} - Raw Message: {payload_raw}")
+    except (ValueError, TypeError, KeyError, IndexError) as e:
+        print(f"❌ Invalid Payload: {e} - Raw Message: {payload_raw}")
+
+def grow_values(n):
+    last_values.extend([math.nan] * (n - len(last_values)))
+
+# ------------------- Start Ingest -------------------
+def start():
+    """ Creates the telemetry store and subscribes to MQTT in the background. """
+    global store, analytics, registry, path
+
+    store = TelemetryWriter.create(STORE_NAME, CHANNELS, capacity=STORE_CAPACITY)
+    analytics = Analytics(CHANNELS, AnalyticsBlock.create(ANALYTICS_NAME))
+    path = PathBlock.create(PATH_NAME)
+
+    # New payload shapes add their channels to the store on first sight
+    registry = SchemaRegistry(store.add_channel, grow_values)
+    registry.derive("alvik/sensors", ("pitch", "roll", "yaw"),
+                    ("accel_x", "accel_y", "accel_z", "gyro_z"), derive_angles)
+
+    client = mqtt.Client()
+    client.on_message = on_message
+    client.connect(MQTT_BROKER, 1883, 60)
+    for topic in MQTT_TOPICS:
+        client.subscribe(topic)
+    client.loop_start()  # Run in the background
+    return client
+
+if __name__ == "__main__":
+    try:
+        client = start()
+    except RuntimeError as e:
+        raise SystemExit(f"❌ {e}")
+    print(f"✅ Ingesting {', '.join(MQTT_TOPICS)} into shared memory '{STORE_NAME}'")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.loop_stop()
+        path.unlink()
+        analytics.block.unlink()
+        store.unlink()
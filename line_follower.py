@@ -6,6 +6,7 @@ import network
 from math import atan2, sqrt
 from umqtt.simple import MQTTClient
 import ntptime
+from alvik_log import Logger, DEBUG, INFO
 
 
 
@@ -13,6 +14,10 @@ import ntptime
 MQTT_BROKER = "192.168.2.14"  # IP do Broker MQTT
 MQTT_TOPIC = "alvik/sensors"
 MQTT_CLIENT_ID = "Alvik_Robot"
+MQTT_LOG_TOPIC = "alvik/logs"
+
+# Registro em RAM; só avisos e erros vão para a serial (use log.dump() no REPL)
+log = Logger("line_follower", level=DEBUG)
 
 # ------------------- CONEXÃO WI-FI -------------------
 def connect_wifi():
@@ -143,9 +148,12 @@ try:
                 # Publicar no MQTT
                 try:
                     client.publish(MQTT_TOPIC, json_payload)
-                    print("📡 Enviado MQTT:", json_payload)
+                    log.debug("📡 Enviado MQTT: %s", json_payload)
+                    # Envia avisos e erros pendentes em lote, a cada 5 s ou 16 registros;
+                    # o payload já vai no tópico de dados e não é reenviado
+                    log.maybe_ship(client, MQTT_LOG_TOPIC, level=INFO)
                 except Exception as e:
-                    print("⚠ Erro ao publicar MQTT:", e)
+                    log.warning("⚠ Erro ao publicar MQTT: %s", e)
                     connect_mqtt()  # Reconectar MQTT se perder conexão
 
                 last_publish_time = current_time
@@ -10,6 +10,10 @@ import json
 import time
 from time import sleep_ms
 
+# Logging: RAM ring, warnings and errors on the serial console
+from alvik_log import Logger, DEBUG
+log = Logger("line_follower_pd", level=DEBUG)
+
 # ---------------------------------------------------------------------
 # FUNCTIONS
 
@@ -37,7 +41,7 @@ def connect_mqtt():
 # Send MQTT message
 def send_message(client, message):
     client.publish(MQTT_TOPIC, message)
-    print(f"Message '{message}' sent to topic '{MQTT_TOPIC}'")
+    log.debug("Message '%s' sent to topic '%s'", message, MQTT_TOPIC)
 
 # Define a callback function to handle incoming MQTT messages
 def mqtt_callback(topic, msg):
@@ -46,6 +50,10 @@ def mqtt_callback(topic, msg):
         # Decode the message and parse the JSON
         data = json.loads(msg.decode())
         
+        # Our own telemetry comes back on the same topic; it is not a tuning command
+        if 'line_sensors' in data:
+            return
+        
         # Update PID constants if they are in the message
         if 'kp' in data:
             kp = data['kp']
@@ -54,9 +62,9 @@ def mqtt_callback(topic, msg):
         if 'kd' in data:
             kd = data['kd']
         
-        print(f"Updated PID constants: kp={kp}, ki={ki}, kd={kd}")
+        log.info("Updated PID constants: kp=%s, ki=%s, kd=%s", kp, ki, kd, every_ms=1000)
     except Exception as e:
-        print(f"Failed to update PID constants: {e}")
+        log.warning("Failed to update PID constants: %s", e, every_ms=1000)
 
 
 # ---------------------------------------------------------------------
@@ -95,6 +103,7 @@ alvik = ArduinoAlvik()
 alvik.begin()
 
 kp = 60.0
+ki = 0.0  # Unused by the PD controller, but accepted from tuning messages
 kd = 15.0
 base_speed = 25 
 line_threshold = 250  # threshold for detecting the line
@@ -127,7 +136,7 @@ try:
             L, CL, C, CR, R = alvik.get_distance()
             T = alvik.get_distance_top()
             B = alvik.get_distance_bottom()
-            print(f'T: {T} | B: {B} | L: {L} | CL: {CL} | C: {C} | CR: {CR} | R: {R}')
+            log.debug('T: %s | B: %s | L: %s | CL: %s | C: %s | CR: %s | R: %s', T, B, L, CL, C, CR, R, every_ms=1000)
 
             line_sensors = alvik.get_line_sensors()
             left, center, right = line_sensors # Split into three variables
@@ -3,6 +3,9 @@ import urequests
 import os
 import machine
 from time import sleep
+from alvik_log import Logger, DEBUG
+
+log = Logger("ota", level=DEBUG, print_level=DEBUG)  # OTA runs once at boot: record and print everything
 
 class OTAUpdater:
     """Handles OTA updates by downloading and comparing the latest firmware file."""
@@ -85,11 +88,9 @@ class OTAUpdater:
         
         current_code = self.get_current_code()
 
-        print("latest_code: ", latest_code)
-
-        print("-------------------")
-
-        print("current_code: ", current_code)
+        # Full firmware texts are kept out of the console; only their sizes are logged
+        log.debug("latest_code: %d bytes", len(latest_code))
+        log.debug("current_code: %d bytes", len(current_code))
         
         if latest_code.strip() == current_code.strip():
             print("✅ Firmware is already up to date. No changes detected.")
@@ -0,0 +1,151 @@
+import math
+import zlib
+
+from telemetry_store import NAME_SIZE
+
+# ------------------- Schema Registry -------------------
+# Maps (topic, payload signature) to a decoder compiled once for that shape.
+# The signature is the payload's key tuple, which the robot scripts always
+# emit in the same order, so the per-message cost is one tuple() and one dict
+# lookup. Each decoder is generated Python that writes every field straight
+# into its store column, with nested lists and dicts flattened into scalar
+# float columns at compile time.
+
+# Column names for list fields whose positions have a meaning
+LIST_COLUMNS = {
+    "line_sensors": ["left", "center", "right"],
+    "speed": ["left_speed", "right_speed"],  # Same columns as line_follower_pd_mqtt.py
+}
+
+# Fields that are not telemetry channels
+IGNORED_KEYS = {"timestamp"}
+
+
+def _column_name(name):
+    """ Fits name into a store channel name, keeping long names unique with a hash. """
+    if len(name.encode()) <= NAME_SIZE:
+        return name
+    suffix = "~%08x" % zlib.crc32(name.encode())
+    head = name.encode()[:NAME_SIZE - len(suffix)].decode(errors="ignore")
+    return head + suffix
+
+
+def _flatten(prefix, value, path, out):
+    """ Appends (column name, access path) pairs for every numeric leaf of value. """
+    if isinstance(value, (list, tuple)):
+        names = LIST_COLUMNS.get(prefix)
+        for i, item in enumerate(value):
+            name = names[i] if names and i < len(names) else f"{prefix}_{i}"
+            _flatten(name, item, path + (i,), out)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(f"{prefix}_{key}", item, path + (key,), out)
+    elif value is None or isinstance(value, (bool, int, float)):
+        out.append((_column_name(prefix), path))
+    # Strings and other values are not plottable and are skipped
+
+
+class Decoder:
+    """ Compiled decoder for one payload shape.
+
+    decode(payload, row) writes the payload's values into row at the store
+    indices of its columns, then fills in any derived columns; indices is the
+    set of store indices it writes.
+    """
+
+    def __init__(self, topic, signature, columns, indices, source, decode):
+        self.topic = topic
+        self.signature = signature
+        self.columns = columns
+        self.indices = indices
+        self.source = source
+        self.decode = decode
+
+
+class SchemaRegistry:
+    """ Compiles and caches one Decoder per (topic, payload signature).
+
+    resolve(name) must return the store column index of a channel, creating
+    the channel if it is new; grow(n) must make rows at least n values long.
+    """
+
+    def __init__(self, resolve, grow):
+        self._resolve = resolve
+        self._grow = grow
+        self._decoders = {}
+        self._derived = {}
+        self._skipped = set()  # Columns already reported as not storable
+
+    def derive(self, topic, outputs, inputs, func):
+        """ Registers func(*inputs) -> outputs, computed for topic's payloads
+        whenever every input column is present. Outputs replace payload fields
+        with the same name.
+        """
+        self._derived.setdefault(topic, []).append((tuple(outputs), tuple(inputs), func))
+
+    @property
+    def decoders(self):
+        return list(self._decoders.values())
+
+    def decode(self, topic, payload, row):
+        """ Decodes payload into row; returns the Decoder that was used. """
+        key = (topic, tuple(payload))
+        decoder = self._decoders.get(key)
+        if decoder is None:
+            decoder = self._decoders[key] = self.compile(topic, payload)
+
+        try:
+            decoder.decode(payload, row)
+        except (IndexError, KeyError, TypeError):
+            # Same keys but a different nested shape: recompile and retry once
+            decoder = self._decoders[key] = self.compile(topic, payload)
+            decoder.decode(payload, row)
+        return decoder
+
+    def compile(self, topic, payload):
+        leaves = []
+        for key, value in payload.items():
+            if key not in IGNORED_KEYS:
+                _flatten(key, value, (key,), leaves)
+
+        present = {name for name, _ in leaves}
+        derived = [(outputs, inputs, func) for outputs, inputs, func in self._derived.get(topic, [])
+                   if present.issuperset(inputs)]
+        derived_outputs = {name for outputs, _, _ in derived for name in outputs}
+        leaves = [(name, path) for name, path in leaves if name not in derived_outputs]
+
+        # Columns the store cannot take (e.g. it is full) are skipped, not fatal
+        indices = {}
+        for name in [name for name, _ in leaves] + [name for outputs, _, _ in derived for name in outputs]:
+            try:
+                indices[name] = self._resolve(name)
+            except ValueError as e:
+                if name not in self._skipped:
+                    self._skipped.add(name)
+                    print(f"⚠ Skipping channel {name} of topic {topic}: {e}")
+        leaves = [(name, path) for name, path in leaves if name in indices]
+        derived = [(outputs, inputs, func) for outputs, inputs, func in derived
+                   if all(name in indices for name in outputs + inputs)]
+        columns = [name for name, _ in leaves] + [name for outputs, _, _ in derived for name in outputs]
+        self._grow(max(indices.values(), default=-1) + 1)
+
+        lines = ["def decode(p, row):"]
+        for name, path in leaves:
+            access = "p" + "".join(f"[{step!r}]" for step in path)
+            lines.append(f"    v = {access}")
+            lines.append(f"    row[{indices[name]}] = nan if v is None else float(v)")
+
+        namespace = {"nan": math.nan}
+        for i, (outputs, inputs, func) in enumerate(derived):
+            namespace[f"derive_{i}"] = func
+            args = ", ".join(f"row[{indices[name]}]" for name in inputs)
+            targets = ", ".join(f"row[{indices[name]}]" for name in outputs)
+            lines.append(f"    {targets}, = derive_{i}({args})")
+
+        if len(lines) == 1:
+            lines.append("    pass")
+
+        source = "\n".join(lines)
+        exec(compile(source, f"<decoder {topic}>", "exec"), namespace)
+        return Decoder(topic, tuple(payload), columns, frozenset(indices[name] for name in columns),
+                       source, namespace["decode"])
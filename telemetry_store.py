@@ -0,0 +1,363 @@
+import math
+import os
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+# ------------------- Shared-Memory Telemetry Store -------------------
+# Columnar ring buffer living in a multiprocessing.shared_memory block.
+# One ingest process owns the writer; any number of dashboard workers attach
+# to the same block by name and read consistent snapshots through a seqlock.
+#
+# Layout (native 8-byte words):
+#   header   : magic, seq, count, capacity, max_channels, n_channels, owner, generation
+#   names    : max_channels * NAME_SIZE bytes, NUL padded UTF-8
+#   timestamp: capacity doubles (epoch seconds)
+#   channels : max_channels * capacity doubles, one column per channel
+#
+# seq is odd while the writer is modifying the block; count is the total
+# number of records ever appended and doubles as the data version. owner is
+# the writer's pid and generation its creation time, so readers can tell a
+# restarted ingest's new block from the one they mapped.
+
+MAGIC = int.from_bytes(b"ALVIKTS1", "big")
+HEADER_WORDS = 8
+HEADER_SIZE = HEADER_WORDS * 8
+NAME_SIZE = 32
+
+DEFAULT_NAME = "alvik"
+DEFAULT_CAPACITY = 4096
+DEFAULT_MAX_CHANNELS = 64
+
+_SEQ, _COUNT, _CAPACITY, _MAX_CHANNELS, _N_CHANNELS = 1, 2, 3, 4, 5
+OWNER, GENERATION = 6, 7  # Same words in every block type of this project
+
+SEQLOCK_TIMEOUT = 1.0  # Seconds a reader waits for a writer to finish
+
+
+def seqlock_read(header, seq_word, func, timeout=SEQLOCK_TIMEOUT):
+    """ Runs func() until it completes without a concurrent write.
+
+    Backs off while a write is in progress and raises TimeoutError if seq
+    stays odd, e.g. because the writer died mid-update.
+    """
+    deadline = None
+    delay = 0.0
+    while True:
+        seq = header[seq_word]
+        if not seq & 1:
+            result = func()
+            if header[seq_word] == seq:
+                return result
+
+        now = time.monotonic()
+        if deadline is None:
+            deadline = now + timeout
+        elif now > deadline:
+            raise TimeoutError("shared memory writer stalled mid-update")
+        time.sleep(delay)
+        delay = min(delay * 2 or 0.0001, 0.01)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists, owned by another user
+    return True
+
+
+def claim_block(name, magic, size):
+    """ Creates a shared memory block, replacing it only if its owner is dead.
+
+    Raises RuntimeError if a live process already owns name, or if name is
+    taken by a block that is not ours.
+    """
+    try:
+        existing = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        pass
+    else:
+        header = existing.buf[:HEADER_SIZE].cast("Q")
+        ours, owner = header[0] == magic, header[OWNER]
+        header.release()
+        existing.close()
+        if ours and not _pid_alive(owner):
+            # Left behind by an ingest process that did not shut down cleanly
+            existing.unlink()
+        else:
+            # Leave the live block alone, including at our own exit
+            resource_tracker.unregister(existing._name, "shared_memory")
+            if ours:
+                raise RuntimeError(f"shared memory '{name}' is owned by running process {owner}")
+            raise RuntimeError(f"shared memory '{name}' exists and is not an Alvik block")
+
+    shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+    header = shm.buf[:HEADER_SIZE].cast("Q")
+    header[0] = magic
+    header[OWNER] = os.getpid()
+    header[GENERATION] = time.time_ns()
+    header.release()
+    return shm
+
+
+def open_block(name):
+    """ Maps an existing block without taking part in its cleanup. """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    # Readers must not unlink the block when they exit
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def block_generation(name):
+    """ Returns the generation of the block currently behind name, or None. """
+    try:
+        shm = open_block(name)
+    except FileNotFoundError:
+        return None
+    header = shm.buf[:HEADER_SIZE].cast("Q")
+    generation = header[GENERATION]
+    header.release()
+    shm.close()
+    return generation
+
+
+def _block_size(capacity, max_channels):
+    return HEADER_SIZE + max_channels * NAME_SIZE + (1 + max_channels) * capacity * 8
+
+
+class TelemetryStore:
+    """ Read-only view of a telemetry block created by TelemetryWriter. """
+
+    def __init__(self, shm):
+        self._shm = shm
+        self._header = shm.buf[:HEADER_SIZE].cast("Q")
+        if self._header[0] != MAGIC:
+            self._header.release()
+            raise ValueError(f"{shm.name} is not a telemetry store")
+
+        self.name = shm.name
+        self.generation = self._header[GENERATION]
+        self.capacity = self._header[_CAPACITY]
+        self.max_channels = self._header[_MAX_CHANNELS]
+
+        offset = HEADER_SIZE + self.max_channels * NAME_SIZE
+        self._columns = []
+        for _ in range(1 + self.max_channels):
+            self._columns.append(shm.buf[offset:offset + self.capacity * 8].cast("d"))
+            offset += self.capacity * 8
+
+        self._channels = []
+
+    @classmethod
+    def attach(cls, name=DEFAULT_NAME):
+        """ Maps an existing store. Raises FileNotFoundError if no ingest is running. """
+        shm = open_block(name)
+        try:
+            return cls(shm)
+        except ValueError:
+            shm.close()
+            raise
+
+    # ------------------- Seqlock -------------------
+    def _read(self, func):
+        """ Runs func() until it completes without a concurrent write. """
+        return seqlock_read(self._header, _SEQ, func)
+
+    # ------------------- Queries -------------------
+    @property
+    def version(self):
+        """ Total number of records appended; changes whenever data does. """
+        return self._header[_COUNT]
+
+    @property
+    def channels(self):
+        """ Channel names in column order. """
+        if len(self._channels) != self._header[_N_CHANNELS]:
+            self._channels = self._read(self._read_names)
+        return list(self._channels)
+
+    def _read_names(self):
+        names = []
+        base = HEADER_SIZE
+        for i in range(self._header[_N_CHANNELS]):
+            raw = bytes(self._shm.buf[base + i * NAME_SIZE:base + (i + 1) * NAME_SIZE])
+            names.append(raw.rstrip(b"\0").decode())
+        return names
+
+    def _copy_rows(self, count, start, stop):
+        """ Copies records [start, stop) of count ever written, per column. """
+        capacity = self.capacity
+        start = max(start, count - capacity, 0)
+        n_columns = 1 + self._header[_N_CHANNELS]
+        if stop <= start:
+            return start, [[] for _ in range(n_columns)]
+
+        first = start % capacity
+        last = first + (stop - start)
+        columns = []
+        for column in self._columns[:n_columns]:
+            if last <= capacity:
+                columns.append(column[first:last].tolist())
+            else:
+                columns.append(column[first:].tolist() + column[:last - capacity].tolist())
+        return start, columns
+
+    def _frame(self, start, stop=None):
+        def read():
+            count = self._header[_COUNT]
+            end = count if stop is None else min(stop, count)
+            begin = max(end + start, 0) if start < 0 else start
+            return (count,) + self._copy_rows(count, begin, end)
+
+        count, first, columns = self._read(read)
+        frame = {"timestamp": columns[0]}
+        for name, column in zip(self.channels, columns[1:]):
+            frame[name] = column
+        return count, first, frame
+
+    def snapshot(self, window=None):
+        """ Returns (version, frame) with the last window records as column lists. """
+        count, _, frame = self._frame(-(window or self.capacity))
+        return count, frame
+
+    def read_since(self, position):
+        """ Returns (version, first, frame) for records appended since position.
+
+        first is the index of the first returned record; it is larger than
+        position when the ring already overwrote some of the requested rows.
+        """
+        return self._frame(position)
+
+    def find(self, timestamp):
+        """ Returns the index of the first retained record at or after timestamp.
+
+        Binary search: the writer must append non-decreasing timestamps.
+        """
+        def read():
+            count = self._header[_COUNT]
+            timestamps = self._columns[0]
+            lo, hi = max(count - self.capacity, 0), count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if timestamps[mid % self.capacity] < timestamp:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            return lo
+
+        return self._read(read)
+
+    def read_columns(self, start, stop, n_channels):
+        """ Returns (first, columns) for records [start, stop) as float64 buffers.
+
+        Only the timestamp and the first n_channels columns are copied, with
+        one memcpy per ring segment; callers can wrap the returned bytearrays
+        without copying them again.
+        """
+        def read():
+            count = self._header[_COUNT]
+            begin = max(start, count - self.capacity, 0)
+            end = max(min(stop, count), begin)
+            first = begin % self.capacity
+            split = min(end - begin, self.capacity - first)
+
+            columns = []
+            for column in self._columns[:1 + n_channels]:
+                buffer = bytearray((end - begin) * 8)
+                out = memoryview(buffer).cast("d")
+                out[:split] = column[first:first + split]
+                out[split:] = column[:end - begin - split]
+                out.release()
+                columns.append(buffer)
+            return begin, columns
+
+        return self._read(read)
+
+    def close(self):
+        for column in self._columns:
+            column.release()
+        self._header.release()
+        self._shm.close()
+
+
+class TelemetryWriter(TelemetryStore):
+    """ Owner of a telemetry block; only the ingest process creates one. """
+
+    @classmethod
+    def create(cls, name=DEFAULT_NAME, channels=(), capacity=DEFAULT_CAPACITY,
+               max_channels=DEFAULT_MAX_CHANNELS):
+        """ Creates the store; raises RuntimeError if a live ingest already owns name. """
+        shm = claim_block(name, MAGIC, _block_size(capacity, max_channels))
+        header = shm.buf[:HEADER_SIZE].cast("Q")
+        header[_SEQ] = 0
+        header[_COUNT] = 0
+        header[_CAPACITY] = capacity
+        header[_MAX_CHANNELS] = max_channels
+        header[_N_CHANNELS] = 0
+        header.release()
+
+        store = cls(shm)
+        for channel in channels:
+            store.add_channel(channel)
+        return store
+
+    def _begin(self):
+        self._header[_SEQ] += 1
+
+    def _end(self):
+        self._header[_SEQ] += 1
+
+    def add_channel(self, name):
+        """ Registers a new column and returns its index. """
+        channels = self.channels
+        if name in channels:
+            return channels.index(name)
+
+        n = len(channels)
+        if n >= self.max_channels:
+            raise ValueError(f"telemetry store is full ({self.max_channels} channels)")
+        raw = name.encode()
+        if len(raw) > NAME_SIZE:
+            raise ValueError(f"channel name too long: {name}")
+
+        # Existing rows have no value for the new channel
+        column = self._columns[1 + n]
+        nan = math.nan
+        self._begin()
+        try:
+            for i in range(self.capacity):
+                column[i] = nan
+            base = HEADER_SIZE + n * NAME_SIZE
+            self._shm.buf[base:base + NAME_SIZE] = raw.ljust(NAME_SIZE, b"\0")
+            self._header[_N_CHANNELS] = n + 1
+        finally:
+            self._end()
+        return n
+
+    def append(self, timestamp, values):
+        """ Appends one record; values is a sequence in channel order.
+
+        Channels past the end of values are stored as NaN.
+        """
+        row = self._header[_COUNT] % self.capacity
+        columns = self._columns
+        n = self._header[_N_CHANNELS]
+        self._begin()
+        try:
+            columns[0][row] = timestamp
+            for column, value in zip(columns[1:1 + n], values):
+                column[row] = value
+            for column in columns[1 + len(values):1 + n]:
+                column[row] = math.nan
+            self._header[_COUNT] += 1
+        finally:
+            self._end()
+
+    def unlink(self):
+        self.close()
+        self._shm.unlink()
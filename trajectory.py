@@ -0,0 +1,244 @@
+import math
+import threading
+from array import array
+
+from telemetry_store import GENERATION, claim_block, open_block, seqlock_read
+
+# ------------------- Trajectory Index -------------------
+# Multi-resolution grid over (pose_x, pose_y) samples. Level 0 keeps every
+# sample index per cell; each coarser level doubles the cell size and keeps
+# only the latest sample that entered a cell. A query inside the viewport
+# returns every level-0 sample if they fit the point budget, an even stride
+# of them (across all laps) if the level-0 cells do, and otherwise one sample
+# per cell of the finest coarse level that fits. Cost follows the number of
+# cells in view and the budget, not the length of the run. Wherever returned
+# samples are not consecutive the path is broken with None, so plots never
+# join points the robot did not drive between.
+
+
+class TrajectoryIndex:
+    """ Incremental spatial index over a robot's driven path. """
+
+    def __init__(self, cell_size=1.0, levels=12):
+        self.cell_size = cell_size
+        self.levels = levels
+        self.xs = []
+        self.ys = []
+        self._grids = [{} for _ in range(levels)]
+        self._bounds = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.xs)
+
+    def _cell(self, x, y, level):
+        size = self.cell_size * (1 << level)
+        return math.floor(x / size), math.floor(y / size)
+
+    def extend(self, xs, ys):
+        """ Adds new pose samples in driving order. """
+        with self._lock:
+            for x, y in zip(xs, ys):
+                if math.isnan(x) or math.isnan(y):
+                    continue
+
+                index = len(self.xs)
+                self.xs.append(x)
+                self.ys.append(y)
+
+                if self._bounds is None:
+                    self._bounds = [x, x, y, y]
+                else:
+                    bounds = self._bounds
+                    bounds[0] = min(bounds[0], x)
+                    bounds[1] = max(bounds[1], x)
+                    bounds[2] = min(bounds[2], y)
+                    bounds[3] = max(bounds[3], y)
+
+                self._grids[0].setdefault(self._cell(x, y, 0), []).append(index)
+                for level in range(1, self.levels):
+                    self._grids[level][self._cell(x, y, level)] = index
+
+    def _cells_in_view(self, level, x_range, y_range):
+        """ Returns the occupied cells of level that intersect the viewport. """
+        grid = self._grids[level]
+        x0, y0 = self._cell(x_range[0], y_range[0], level)
+        x1, y1 = self._cell(x_range[1], y_range[1], level)
+
+        # Scan whichever is smaller: the viewport's cells or the occupied ones
+        if (x1 - x0 + 1) * (y1 - y0 + 1) < len(grid):
+            return [cell for cell in ((cx, cy) for cx in range(x0, x1 + 1)
+                                      for cy in range(y0, y1 + 1)) if cell in grid]
+        return [cell for cell in grid if x0 <= cell[0] <= x1 and y0 <= cell[1] <= y1]
+
+    def _samples_in_view(self, cells, x_range, y_range):
+        """ Returns level-0 sample index lists inside the viewport.
+
+        Cells fully inside are returned as they are; samples of cells on the
+        viewport's edge are filtered and returned as one extra list.
+        """
+        grid = self._grids[0]
+        size = self.cell_size
+        (x0, x1), (y0, y1) = x_range, y_range
+        xs, ys = self.xs, self.ys
+
+        lists, edge = [], []
+        for cell in cells:
+            cx, cy = cell
+            if x0 <= cx * size and (cx + 1) * size <= x1 and y0 <= cy * size and (cy + 1) * size <= y1:
+                lists.append(grid[cell])
+            else:
+                edge += [i for i in grid[cell] if x0 <= xs[i] <= x1 and y0 <= ys[i] <= y1]
+        if edge:
+            lists.append(sorted(edge))
+        return lists
+
+    def query(self, x_range=None, y_range=None, max_points=2000):
+        """ Returns (xs, ys) of the path inside the viewport, in driving order.
+
+        Missing ranges default to the full extent of the path. Runs of
+        consecutive samples are separated by None, Plotly's line break.
+        """
+        with self._lock:
+            if self._bounds is None:
+                return [], []
+
+            x_range = sorted(x_range) if x_range else self._bounds[0:2]
+            y_range = sorted(y_range) if y_range else self._bounds[2:4]
+
+            # Level 0: all samples, or an even stride over them if over budget
+            cells = self._cells_in_view(0, x_range, y_range)
+            if len(cells) <= max_points:
+                lists = self._samples_in_view(cells, x_range, y_range)
+                total = sum(len(samples) for samples in lists)
+                if total <= max_points:
+                    indices = sorted(i for samples in lists for i in samples)
+                else:
+                    # Every list contributes ceil(n / stride) samples, at most
+                    # total / stride + len(lists) <= max_points in all
+                    stride = -(-total // max(max_points - len(lists), 1))
+                    indices = sorted(i for samples in lists for i in samples[::stride])
+            else:
+                # Too many cells in view: finest coarse level that fits
+                for level in range(1, self.levels):
+                    cells = self._cells_in_view(level, x_range, y_range)
+                    if len(cells) <= max_points:
+                        break
+                grid = self._grids[level]
+                indices = sorted(grid[cell] for cell in cells)
+
+            xs, ys = [], []
+            previous = None
+            for i in indices:
+                if previous is not None and i != previous + 1:
+                    xs.append(None)
+                    ys.append(None)
+                xs.append(self.xs[i])
+                ys.append(self.ys[i])
+                previous = i
+            return xs, ys
+
+
+# ------------------- Shared Pose History -------------------
+# The whole run's (pose_x, pose_y) path, appended by the ingest process and
+# read by every dashboard worker, so all workers index the same trajectory
+# however long the run and whenever they started. When the block fills up
+# every other pose is dropped and the epoch word is bumped, telling readers
+# to rebuild their index from the start.
+#
+# Layout: header (magic, seq, count, capacity, epoch, -, owner, generation),
+# then capacity doubles of pose_x and capacity doubles of pose_y.
+
+MAGIC = int.from_bytes(b"ALVIKPT1", "big")
+HEADER_WORDS = 8
+HEADER_SIZE = HEADER_WORDS * 8
+DEFAULT_NAME = "alvik_path"
+DEFAULT_CAPACITY = 1 << 20  # Poses kept at full resolution (16 MiB)
+
+_SEQ, _COUNT, _CAPACITY, _EPOCH = 1, 2, 3, 4
+
+
+class PathBlock:
+    """ Append-only pose history in shared memory.
+
+    Appends only write past count, so readers copy existing poses without
+    holding the seqlock; only compaction rewrites them, under a new epoch.
+    """
+
+    def __init__(self, shm):
+        self._shm = shm
+        self._header = shm.buf[:HEADER_SIZE].cast("Q")
+        if self._header[0] != MAGIC:
+            self._header.release()
+            raise ValueError(f"{shm.name} is not a path block")
+        self.generation = self._header[GENERATION]
+        self.capacity = self._header[_CAPACITY]
+        size = self.capacity * 8
+        self._xs = shm.buf[HEADER_SIZE:HEADER_SIZE + size].cast("d")
+        self._ys = shm.buf[HEADER_SIZE + size:HEADER_SIZE + 2 * size].cast("d")
+
+    @classmethod
+    def create(cls, name=DEFAULT_NAME, capacity=DEFAULT_CAPACITY):
+        shm = claim_block(name, MAGIC, HEADER_SIZE + 2 * capacity * 8)
+        header = shm.buf[:HEADER_SIZE].cast("Q")
+        header[_CAPACITY] = capacity
+        header.release()
+        return cls(shm)
+
+    @classmethod
+    def attach(cls, name=DEFAULT_NAME):
+        shm = open_block(name)
+        try:
+            return cls(shm)
+        except ValueError:
+            shm.close()
+            raise
+
+    @property
+    def version(self):
+        """ (epoch, count); changes whenever the path does. """
+        return seqlock_read(self._header, _SEQ, lambda: (self._header[_EPOCH], self._header[_COUNT]))
+
+    def append(self, x, y):
+        count = self._header[_COUNT]
+        if count == self.capacity:
+            count = self._compact(count)
+        self._xs[count] = x
+        self._ys[count] = y
+        self._header[_COUNT] = count + 1
+
+    def _compact(self, count):
+        """ Keeps every other pose; returns the new count. """
+        xs, ys = array("d", self._xs[0:count:2]), array("d", self._ys[0:count:2])
+        self._header[_SEQ] += 1
+        try:
+            self._xs[:len(xs)] = xs
+            self._ys[:len(ys)] = ys
+            self._header[_COUNT] = len(xs)
+            self._header[_EPOCH] += 1
+        finally:
+            self._header[_SEQ] += 1
+        return len(xs)
+
+    def read_since(self, position, epoch):
+        """ Returns (epoch, count, xs, ys) with the poses appended since position.
+
+        If the block was compacted since epoch, every pose is returned.
+        """
+        while True:
+            current, count = self.version
+            start = position if current == epoch else 0
+            xs = self._xs[start:count].tolist()
+            ys = self._ys[start:count].tolist()
+            if self.version[0] == current:
+                return current, count, xs, ys
+
+    def close(self):
+        self._xs.release()
+        self._ys.release()
+        self._header.release()
+        self._shm.close()
+
+    def unlink(self):
+        self.close()
+        self._shm.unlink()